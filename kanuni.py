@@ -1,14 +1,12 @@
 import time
-from collections import UserList
 from contextlib import suppress
 from dataclasses import asdict, dataclass, field
 from enum import Enum
-from itertools import repeat
 from random import choice, randrange
-from typing import Sequence
 from functools import lru_cache
 
 import arcade
+import numpy as np
 from arcade import color as Color
 from arcade import key as Key
 
@@ -17,9 +15,8 @@ CONFIG = {
     "tiles": {"sep": 5, "row": 20, "col": 20, "width": 30, "height": 30},
     "window": {"title": "Kanuni", "padding": 150},
     "colors": {0: Color.AQUA, 1: Color.ANTIQUE_FUCHSIA, 2: Color.GREEN, 3: Color.RED},
-    "game": {"max_food": 10},
+    "game": {"max_food": 10, "death_rate": 0.05, "event_ttl": 5},
     "food_types": {2: "herb", 3: "carn"},
-    "movement": {"x": "y", "y": "x"},
 }
 
 sep = CONFIG["tiles"]["sep"]
@@ -31,6 +28,16 @@ CONFIG["window"]["height"] = (
     (CONFIG["tiles"]["height"] + sep) * CONFIG["tiles"]["row"] + sep + pad
 )
 
+TILE_W, TILE_H = CONFIG["tiles"]["width"], CONFIG["tiles"]["height"]
+COLS, ROWS = CONFIG["tiles"]["col"], CONFIG["tiles"]["row"]
+PAD_HALF = pad // 2
+COLOR_LUT = np.zeros((4, 3), dtype=np.uint8)
+for value, color in CONFIG["colors"].items():
+    COLOR_LUT[value] = color
+MAX_FOOD = CONFIG["game"]["max_food"]
+DEATH_RATE = CONFIG["game"]["death_rate"]
+EVENT_TTL = CONFIG["game"]["event_ttl"]
+
 
 class Feeding(Enum):
     HERB = "Herb"
@@ -41,83 +48,119 @@ class Feeding(Enum):
         return f"{self.value.title()}ivor"
 
 
-@dataclass
-class Cell:
-    x: int = 0
-    y: int = 0
+_FEEDING_CHOICES = tuple(Feeding)
+
+_EATS = {
+    (Feeding.HERB, 2): True,
+    (Feeding.HERB, 3): False,
+    (Feeding.CARN, 2): False,
+    (Feeding.CARN, 3): True,
+    (Feeding.OMN, 2): True,
+    (Feeding.OMN, 3): True,
+}
+
 
-    def update_coords(self, direction, by):
-        prev = getattr(self, direction)
-        setattr(self, f"_{direction}", prev)
-        setattr(self, direction, prev + by)
+@lru_cache(None)
+def info_text(template, value):
+    return template.format(value)
 
 
-@dataclass
+@dataclass(slots=True)
 class Features:
     food: int = 1
     speed: int = 1
     feeding: Feeding = Feeding.HERB
 
 
-@dataclass
+@dataclass(slots=True)
 class Player:
-    cells: Sequence[Cell] = None
     points: int = 0
     level: int = 1
     loses: int = 0
     features: Features = field(default_factory=Features)
+    cells_x: np.ndarray = field(init=False, repr=False)
+    cells_y: np.ndarray = field(init=False, repr=False)
+    _prev_x: np.ndarray = field(init=False, repr=False)
+    _prev_y: np.ndarray = field(init=False, repr=False)
+    _occupied: set = field(init=False, repr=False)
 
     def __post_init__(self):
-        self.cells = [Cell()]
-        self.features.feeding = choice(tuple(Feeding.__members__.values()))
+        self.cells_x = np.array([0], dtype=np.int16)
+        self.cells_y = np.array([0], dtype=np.int16)
+        self._prev_x = self.cells_x.copy()
+        self._prev_y = self.cells_y.copy()
+        self._occupied = {(0, 0)}
+        self.features.feeding = choice(_FEEDING_CHOICES)
 
     def obtain_cell(self):
-        for _ in range(len(self.cells)):
-            cell = choice(self.cells)
-            through = choice(("x", "y"))
-            opp = CONFIG["movement"][through]
-            cell = Cell(
-                **{through: getattr(cell, through) + 1, opp: getattr(cell, opp)}
-            )
-            if self.cell_collision(cell.x, cell.y):
+        for _ in range(self.cells_x.size):
+            idx = randrange(self.cells_x.size)
+            if choice((True, False)):
+                x, y = self.cells_x[idx] + 1, self.cells_y[idx]
+            else:
+                x, y = self.cells_x[idx], self.cells_y[idx] + 1
+            if self.cell_collision(y, x):
                 continue
-            if cell.x < CONFIG["tiles"]["col"] and cell.y < CONFIG["tiles"]["row"]:
-                self.cells.append(cell)
+            if x < COLS and y < ROWS:
+                self._occupied.add((int(x), int(y)))
+                self.cells_x = np.append(self.cells_x, x)
+                self.cells_y = np.append(self.cells_y, y)
+                self._prev_x = np.append(self._prev_x, x)
+                self._prev_y = np.append(self._prev_y, y)
                 return
 
+    def lose_cell(self):
+        self._occupied.discard((int(self.cells_x[-1]), int(self.cells_y[-1])))
+        self.cells_x, self._prev_x = self.cells_x[:-1], self._prev_x[:-1]
+        self.cells_y, self._prev_y = self.cells_y[:-1], self._prev_y[:-1]
+
     def obtain_new_feature(self):
         self.features.food += randrange(1, 4)
         self.features.speed += randrange(-1, 2)
-        self.features.feeding = choice(tuple(Feeding.__members__.values()))
+        self.features.feeding = choice(_FEEDING_CHOICES)
 
-        for item, value in vars(self.features).items():
-            if value == 0:
-                setattr(self.features, item, 1)
+        if self.features.food == 0:
+            self.features.food = 1
+        if self.features.speed == 0:
+            self.features.speed = 1
 
         self.obtain_cell()
 
+    def sync_cells(self):
+        self._occupied = set(zip(self.cells_x.tolist(), self.cells_y.tolist()))
+
     def cell_collision(self, row, col):
-        for cell in self.cells:
-            if cell.y == row and cell.x == col:
-                return True
-        return False
+        return (col, row) in self._occupied
 
     @property
     def required_points(self):
         return self.level * 4
 
 
-class Grid(UserList):
-    def __init__(self, row, col, **kwargs):
-        self.data = [list(repeat(0, col)).copy() for _ in range(row)]
-        self._buffer = self.data.copy()
+class Grid:
+    def __init__(self, row, col, sep, width, height, **kwargs):
+        self.data = np.zeros((row, col), dtype=np.uint8)
+
+        xs = np.arange(1, col + 1) * (sep + width) + PAD_HALF  # centerize
+        ys = np.arange(1, row + 1) * (sep + height) + PAD_HALF
+        self.xy_cache = np.stack(np.meshgrid(xs, ys), axis=-1)
+        self.dirty = True
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def reset(self):
+        self.data.fill(0)
+        self.dirty = True
 
     def set_block(self, col, row, value):
-        self.data[row][col] = value
+        if self.data[row, col] != value:
+            self.data[row, col] = value
+            self.dirty = True
 
     def get_block(self, col, row):
-        return self.data[row][col]
-    
+        return self.data[row, col]
+
 
 
 class Controller(arcade.Window):
@@ -126,38 +169,61 @@ class Controller(arcade.Window):
 
         self.grid = Grid(**CONFIG["tiles"])
         self.player = Player()
+        self.rng = np.random.default_rng()
         self.herb_foods = 0
         self.carn_foods = 0
 
+        self.base_shapes = arcade.ShapeElementList()
+        for x, y in self.grid.xy_cache.reshape(-1, 2):
+            self.base_shapes.append(
+                arcade.create_rectangle_filled(int(x), int(y), TILE_W, TILE_H, Color.AQUA)
+            )
+
         arcade.set_background_color(Color.WHITE)
         self.pending_task = None
         self.event = None
         self.event_timer = 0
+        self._last_tick = time.monotonic()
 
     def draw_info(self):
-        arcade.draw_text(f"DNA Points: {self.player.points}", 90, 0, Color.BLACK, 16)
         arcade.draw_text(
-            f"Feeding Type: {self.player.features.feeding}", 250, 0, Color.BLACK, 16
+            info_text("DNA Points: {}", self.player.points), 90, 0, Color.BLACK, 16
+        )
+        arcade.draw_text(
+            info_text("Feeding Type: {}", self.player.features.feeding),
+            250,
+            0,
+            Color.BLACK,
+            16,
         )
         arcade.draw_text(
-            f"Food Modifier: {self.player.features.food}", 500, 0, Color.BLACK, 16
+            info_text("Food Modifier: {}", self.player.features.food),
+            500,
+            0,
+            Color.BLACK,
+            16,
         )
 
         arcade.draw_text(
-            f"Collect {self.player.required_points} DNA points and press G to evolve.",
+            info_text(
+                "Collect {} DNA points and press G to evolve.",
+                self.player.required_points,
+            ),
             150,
             50,
             Color.BLACK,
             16,
         )
-        arcade.draw_text(f"Generation: {self.player.level}", 290, 800, Color.BLACK, 16)
         arcade.draw_text(
-            f"Speed: {self.player.features.speed}", 490, 800, Color.BLACK, 16
+            info_text("Generation: {}", self.player.level), 290, 800, Color.BLACK, 16
+        )
+        arcade.draw_text(
+            info_text("Speed: {}", self.player.features.speed), 490, 800, Color.BLACK, 16
         )
 
         if self.event:
             arcade.draw_text(
-                f"!!!!!!!!!!! - {self.event} - !!!!!!!!!!!!!!!!!!",
+                info_text("!!!!!!!!!!! - {} - !!!!!!!!!!!!!!!!!!", self.event),
                 100,
                 830,
                 Color.RED,
@@ -165,102 +231,124 @@ class Controller(arcade.Window):
             )
 
     def draw_grid(self):
-        self.shape_list = arcade.ShapeElementList()
-
-        sep, row, col, width, height = CONFIG["tiles"].values()
-        padding = CONFIG["window"]["padding"]
-        for ridx, row in enumerate(self.grid):
-            for cidx, col in enumerate(self.grid[ridx]):
-                color = CONFIG["colors"].get(col, Color.AQUA)
+        if not self.grid.dirty:
+            return
 
-                x = (sep + width) * cidx + (sep + width) + padding // 2  # centerize
-                y = (sep + height) * ridx + (sep + height) + padding // 2
+        self.grid.dirty = False
+        self.shape_list = arcade.ShapeElementList()
 
-                rect = arcade.create_rectangle_filled(x, y, width, height, color)
-                self.shape_list.append(rect)
+        tiles = np.argwhere(self.grid.data != 0)
+        colors = COLOR_LUT[self.grid.data[tiles[:, 0], tiles[:, 1]]]
+        coords = self.grid.xy_cache[tiles[:, 0], tiles[:, 1]]
+        for (x, y), color in zip(coords.tolist(), colors.tolist()):
+            rect = arcade.create_rectangle_filled(x, y, TILE_W, TILE_H, tuple(color))
+            self.shape_list.append(rect)
 
     def _draw_foods(self, food, amount):
         if amount <= 0:
             return 0
 
+        candidates = self.rng.integers(0, (COLS, ROWS), size=(amount * 2, 2))
+        candidates = candidates[self.grid.data[candidates[:, 1], candidates[:, 0]] == 0]
+
         increased = 0
-        for _ in range(amount):
-            row = randrange(CONFIG["tiles"]["row"])
-            col = randrange(CONFIG["tiles"]["col"])
-            if self.player.cell_collision(row, col):
+        for col, row in candidates.tolist():
+            if increased == amount:
+                break
+            if self.player.cell_collision(row, col) or self.grid.data[row, col] != 0:
                 continue
 
-            self.grid.set_block(row, col, food)
+            self.grid.set_block(col, row, food)
             increased += 1
         return increased
 
     def draw_foods(self):
-        herb_amount = CONFIG["game"]["max_food"] - self.herb_foods
-        carn_amount = CONFIG["game"]["max_food"] - self.carn_foods
+        herb_amount = MAX_FOOD - self.herb_foods
+        carn_amount = MAX_FOOD - self.carn_foods
         self.herb_foods += self._draw_foods(2, herb_amount)
         self.carn_foods += self._draw_foods(3, carn_amount)
 
     def draw_player(self, value=1):
-        for cell in self.player.cells:
-            self.grid.set_block(cell.x, cell.y, value)
+        cells = self.grid.data[self.player.cells_y, self.player.cells_x]
+        if (cells != value).any():
+            self.grid.data[self.player.cells_y, self.player.cells_x] = value
+            self.grid.dirty = True
         self.draw_foods()
         self.draw_info()
         self.draw_grid()
     
+    def on_update(self, delta_time):
+        now = time.monotonic()
+        elapsed = now - self._last_tick
+        self._last_tick = now
+
+        self.event_timer += elapsed
+        if self.event and self.event_timer > EVENT_TTL:
+            self.event = None
+
+        if self.rng.random() < DEATH_RATE * elapsed and self.player.cells_x.size > 1:
+            self.player.loses += 1
+            self.event = (
+                f"Oh no! One of your cells' died. Total {self.player.loses} cells died."
+            )
+            self.event_timer = 0
+            self.grid.set_block(
+                int(self.player.cells_x[-1]), int(self.player.cells_y[-1]), 0
+            )
+            self.player.lose_cell()
+
     def on_draw(self):
         arcade.start_render()
         self.draw_player()
+        self.base_shapes.draw()
         self.shape_list.draw()
 
     def on_key_release(self, key, *args):
         self.draw_player(0)
-        actions = {
-            Key.W: ("y", self.player.features.speed),
-            Key.S: ("y", -self.player.features.speed),
-            Key.D: ("x", self.player.features.speed),
-            Key.A: ("x", -self.player.features.speed),
-            Key.G: ("evolve", self.player.required_points),
-            Key.R: ("restart", None),
-        }
         if self.pending_task:
             task, *args = self.pending_task
             getattr(self.grid, task)(*args)
-        if actions.get(key):
-            direction, amount = actions[key]
-            with suppress(IndexError):
-                for cell in self.player.cells:
-                    if direction == "y":
-                        x, y = cell.x, cell.y + amount
-                        current = self.grid.get_block(x, y)
-                    elif direction == "x":
-                        x, y = cell.x + amount, cell.y
-                        current = self.grid.get_block(x, y)
-                    else:
-                        self.update_player(direction, amount)
-                        return
-
-                    self.update_player("tile", current, x, y)
-                    cell.update_coords(direction, amount)
 
-    def update_player(self, utype, action, *args):
-        self.event_timer += 1
-        if randrange(0, 250) == 66 and len(self.player.cells) > 1:
-            self.player.loses += 1
-            self.event = (
-                f"Oh no! One of your cells' died. Total {self.player.loses} cells died."
-            )
-            self.player.cells.pop()
+        match key:
+            case Key.W:
+                direction, sign = "y", 1
+            case Key.S:
+                direction, sign = "y", -1
+            case Key.D:
+                direction, sign = "x", 1
+            case Key.A:
+                direction, sign = "x", -1
+            case Key.G:
+                self.update_player("evolve", self.player.required_points)
+                return
+            case Key.R:
+                self.update_player("restart", None)
+                return
+            case _:
+                return
+
+        amount = sign * self.player.features.speed
+        if direction == "y":
+            new_xs = self.player.cells_x
+            new_ys = self.player.cells_y + amount
+        else:
+            new_xs = self.player.cells_x + amount
+            new_ys = self.player.cells_y
+
+        with suppress(IndexError):
+            currents = self.grid.data[new_ys, new_xs]
+            np.copyto(self.player._prev_x, self.player.cells_x)
+            np.copyto(self.player._prev_y, self.player.cells_y)
+            self.player.cells_x, self.player.cells_y = new_xs, new_ys
+            self.player.sync_cells()
+            for idx in np.flatnonzero(currents >= 2):
+                self.update_player("tile", currents[idx], new_xs[idx], new_ys[idx])
 
+    def update_player(self, utype, action, *args):
         if utype == "tile" and action in {3, 2}:
-            feeding = self.player.features.feeding
-            if feeding is not Feeding.OMN:
-                if feeding is Feeding.CARN and action == 3:
-                    pass
-                elif feeding is Feeding.HERB and action == 2:
-                    pass
-                else:
-                    self.pending_task = "set_block", *args, action
-                    return
+            if not _EATS[self.player.features.feeding, action]:
+                self.pending_task = "set_block", *args, action
+                return
             self.player.points += self.player.features.food
 
             attr = f"{CONFIG['food_types'][action]}_foods"
@@ -274,7 +362,7 @@ class Controller(arcade.Window):
         
         elif utype == "restart":
             self.player = Player()
-            self.grid = Grid(**CONFIG["tiles"])
+            self.grid.reset()
             self.herb_foods = 0
             self.carn_foods = 0
 
@@ -282,6 +370,7 @@ class Controller(arcade.Window):
             self.pending_task = None
             self.event = None
             self.event_timer = 0
+            self._last_tick = time.monotonic()
 
 
 def main():